@@ -0,0 +1,117 @@
+import json
+from pathlib import Path
+
+from recipe_buddy.logging_config import logger
+from recipe_buddy.schemas import Ingredient, IngredientType, UnitOfMeasurement
+
+# Bump this whenever the cached Ingredient schema changes.
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "recipe_buddy" / "ingredients.json"
+
+
+class IngredientCache:
+    """A persistent cache of parsed ingredients keyed by Notion page ID.
+
+    Each entry stores the page's ``last_edited_time`` alongside the parsed
+    ingredient, so only pages edited since the last sync need to be fetched
+    and parsed again. Pages deleted from Notion are not reported by an
+    incremental query, so call ``invalidate`` to force a full resync.
+
+    Parameters
+    ----------
+    database_id: str
+        The ID of the Notion database the cache belongs to.
+    path: Path | None
+        The path of the cache file. Defaults to
+        ``~/.cache/recipe_buddy/ingredients.json``.
+
+    Attributes
+    ----------
+    database_id: str
+        The ID of the Notion database the cache belongs to.
+    path: Path
+        The path of the cache file.
+
+    Methods
+    -------
+    last_edited_time: str | None
+        The most recent ``last_edited_time`` of any cached page.
+    ingredients: list[Ingredient]
+        All cached ingredients.
+    set: None
+        Add or replace the ingredient for a page.
+    discard: None
+        Remove a page from the cache, if present.
+    invalidate: None
+        Remove all entries from the cache.
+    save: None
+        Write the cache to disk.
+    """
+
+    def __init__(self, database_id: str, path: Path | None = None):
+        self.database_id = database_id
+        self.path = DEFAULT_CACHE_PATH if path is None else Path(path)
+        self._entries = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.info(f"Ignoring unreadable ingredient cache {self.path}: {e}")
+            return {}
+        if (
+            data.get("version") != CACHE_VERSION
+            or data.get("database_id") != self.database_id
+        ):
+            return {}
+        return data.get("entries", {})
+
+    def last_edited_time(self) -> str | None:
+        """Return the most recent ``last_edited_time`` of any cached page."""
+        return max(
+            (entry["last_edited_time"] for entry in self._entries.values()),
+            default=None,
+        )
+
+    def ingredients(self) -> list[Ingredient]:
+        """Return all cached ingredients."""
+        return [
+            Ingredient.model_construct(
+                **{
+                    **entry["ingredient"],
+                    "type": IngredientType.from_raw(entry["ingredient"]["type"]),
+                    "units_of_measurement": UnitOfMeasurement.from_raw(
+                        entry["ingredient"]["units_of_measurement"]
+                    ),
+                }
+            )
+            for entry in self._entries.values()
+        ]
+
+    def set(self, page_id: str, last_edited_time: str, ingredient: Ingredient) -> None:
+        """Add or replace the ingredient for a page."""
+        self._entries[page_id] = {
+            "last_edited_time": last_edited_time,
+            "ingredient": ingredient.model_dump(mode="json"),
+        }
+
+    def discard(self, page_id: str) -> None:
+        """Remove a page from the cache, if present."""
+        self._entries.pop(page_id, None)
+
+    def invalidate(self) -> None:
+        """Remove all entries from the cache."""
+        self._entries = {}
+
+    def save(self) -> None:
+        """Write the cache to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": CACHE_VERSION,
+            "database_id": self.database_id,
+            "entries": self._entries,
+        }
+        self.path.write_text(json.dumps(data))
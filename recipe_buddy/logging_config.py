@@ -4,6 +4,7 @@ import sys
 
 logger = logging.getLogger("recipe_buddy")
 logger.setLevel(logging.INFO)
+logger.propagate = False
 
 formatter = logging.Formatter(
     "[%(asctime)s] [%(name)s] [%(levelname)s] - %(message)s",
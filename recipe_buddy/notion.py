@@ -1,46 +1,46 @@
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
 import os
-from typing import Any
+import threading
+import time
+from typing import Any, Self
 
 from dotenv import load_dotenv
-from pydantic import BaseModel, ValidationError
-import requests
+import httpx
+import orjson
+from pydantic import BaseModel
 
+from recipe_buddy.cache import IngredientCache
 from recipe_buddy.logging_config import logger
-from recipe_buddy.schemas import Ingredient
+from recipe_buddy.schemas import Ingredient, IngredientType, UnitOfMeasurement
 
-load_dotenv()
+NOTION_VERSION = "2022-06-28"
 
-NOTION_HEADERS = {
-    "Authorization": f"Bearer {os.getenv('NOTION_TOKEN')}",
-    "Notion-Version": "2022-06-28",
-}
-
-
-class User(BaseModel):
-    object: str
-    id: str
+# Notion allows an average of three requests per second per integration.
+NOTION_REQUESTS_PER_SECOND = 3
 
+# Large database queries can take longer than httpx's 5 second default.
+NOTION_TIMEOUT = httpx.Timeout(30.0)
 
-class Parent(BaseModel):
-    type: str
-    database_id: str
 
+@dataclass(slots=True)
+class Page:
+    """The parts of a Notion page that are needed to parse an ingredient."""
 
-class Page(BaseModel):
-    object: str
     id: str
-    created_time: str
     last_edited_time: str
-    created_by: User
-    last_edited_by: User
-    cover: Any | None = None
-    icon: Any | None = None
-    parent: Parent
-    archived: bool
-    in_trash: bool
     properties: dict[str, dict[str, Any]]
-    url: str
-    public_url: str | None = None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "Page":
+        """Create a page from a Notion API page object, dropping unused fields."""
+        return cls(
+            id=data["id"],
+            last_edited_time=data["last_edited_time"],
+            properties=data["properties"],
+        )
 
 
 class NotionAPIDatabaseResponse(BaseModel):
@@ -60,6 +60,9 @@ class NotionDatabase:
     ----------
     database_id: str
         The ID of the Notion database to interact with.
+    cache: IngredientCache | None
+        An optional cache of parsed ingredients. If given, only pages
+        edited since the last sync are fetched from Notion.
 
     Attributes
     ----------
@@ -67,19 +70,86 @@ class NotionDatabase:
         The ID of the Notion database to interact with.
     base_url: str
         The base URL for the Notion API.
+    cache: IngredientCache | None
+        The cache of parsed ingredients, if any.
 
     Methods
     -------
     get_ingredients_data: list[Ingredient]
         Get the ingredients data from the Notion database.
+    close: None
+        Close the underlying HTTP client.
+
+    Raises
+    ------
+    RuntimeError
+        If the NOTION_TOKEN environment variable is not set.
     """
 
-    def __init__(self, database_id: str):
+    _env_loaded = False
+
+    def __init__(self, database_id: str, cache: IngredientCache | None = None):
         self.database_id = database_id
         self.base_url = f"https://api.notion.com/v1/databases/{database_id}"
+        self.cache = cache
+        if not NotionDatabase._env_loaded:
+            load_dotenv()
+            NotionDatabase._env_loaded = True
+        try:
+            token = os.environ["NOTION_TOKEN"]
+        except KeyError:
+            raise RuntimeError("NOTION_TOKEN not set") from None
+        self._client = httpx.Client(
+            http2=True,
+            timeout=NOTION_TIMEOUT,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Notion-Version": NOTION_VERSION,
+            },
+        )
+        self._rate_limit_lock = threading.Lock()
+        self._next_request_time = 0.0
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying HTTP client."""
+        self._client.close()
+
+    def _wait_for_rate_limit(self) -> None:
+        """Block until another request fits within the Notion rate limit."""
+        with self._rate_limit_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + (
+                1 / NOTION_REQUESTS_PER_SECOND
+            )
+        if wait > 0:
+            time.sleep(wait)
+
+    def _post(self, url: str, payload: dict[str, Any]) -> httpx.Response:
+        """POST to the Notion API, retrying once if rate limited."""
+        self._wait_for_rate_limit()
+        response = self._client.post(url, json=payload)
+        if response.status_code == 429:
+            retry_after = int(response.headers.get("Retry-After", 1))
+            logger.info(f"Rate limited by Notion, retrying in {retry_after}s")
+            time.sleep(retry_after)
+            self._wait_for_rate_limit()
+            response = self._client.post(url, json=payload)
+        response.raise_for_status()
+        return response
 
     def _get_database_page(
-        self, page_size: int | None = None, start_cursor: str | None = None
+        self,
+        page_size: int | None = None,
+        start_cursor: str | None = None,
+        query_filter: dict[str, Any] | None = None,
+        validate: bool = False,
     ) -> NotionAPIDatabaseResponse:
         url = f"{self.base_url}/query"
         if page_size is None:
@@ -93,42 +163,167 @@ class NotionDatabase:
                 "page_size": page_size,
                 "start_cursor": start_cursor,
             }
-        response = requests.post(url, headers=NOTION_HEADERS, json=payload)
-        return NotionAPIDatabaseResponse(**response.json())
+        if query_filter is not None:
+            payload["filter"] = query_filter
+        response = self._post(url, payload)
+        data = orjson.loads(response.content)
+        if validate:
+            return NotionAPIDatabaseResponse.model_validate(data)
+        # Responses come straight from the Notion API, so skip validation.
+        data["results"] = [Page.from_api(page) for page in data["results"]]
+        return NotionAPIDatabaseResponse.model_construct(**data)
 
-    def get_ingredients_data(self) -> list[Ingredient]:
+    def get_ingredients_data(self, prefetch: bool = True) -> list[Ingredient]:
         """Parse a notion ingredient database to ingredient objects.
 
         This method gets all pages from the databas recursively, and
         parses them into ingredient objects. Any ingredients that are
         missing required attributes are skipped.
 
+        Parameters
+        ----------
+        prefetch: bool
+            Whether to fetch the next page in a background thread while
+            the current page is parsed. If False, pages are fetched and
+            parsed serially.
+
         Returns
         -------
         list[Ingredient]
             A list of ingredient objects.
         """
-        pages = []
-        has_more = True
-        start_cursor = None
-        while has_more:
-            page_data = self._get_database_page(start_cursor=start_cursor)
-            pages.extend(page_data.results)
-            has_more = page_data.has_more
-            start_cursor = page_data.next_cursor
-        return parse_ingredient_data(pages)
+        query_filter = None
+        if self.cache is not None:
+            last_edited_time = self.cache.last_edited_time()
+            if last_edited_time is not None:
+                # Notion truncates last_edited_time to the minute, so include
+                # pages edited at the cached timestamp as well.
+                query_filter = {
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": last_edited_time},
+                }
 
+        pages = self._iter_pages(query_filter=query_filter, prefetch=prefetch)
+        if self.cache is None:
+            return parse_ingredient_data(pages)
+        # Only update the cache once every page has been fetched, so a failed
+        # sync cannot advance last_edited_time past pages it never saw.
+        updates = [(page, parse_ingredient_data([page])) for page in pages]
+        for page, parsed in updates:
+            if parsed:
+                self.cache.set(page.id, page.last_edited_time, parsed[0])
+            else:
+                self.cache.discard(page.id)
+        self.cache.save()
+        return self.cache.ingredients()
 
-def parse_ingredient_data(database_data: list[Page]) -> list[Ingredient]:
-    """Parse a list of Notion pages into ingredient objects.
+    def _iter_pages(
+        self, query_filter: dict[str, Any] | None = None, prefetch: bool = True
+    ) -> Iterator[Page]:
+        """Yield every page of the database, one API response at a time.
+
+        If prefetch is True, the next response is requested in a background
+        thread while the pages of the current response are consumed.
+        """
+        if not prefetch:
+            has_more = True
+            start_cursor = None
+            while has_more:
+                page_data = self._get_database_page(
+                    start_cursor=start_cursor, query_filter=query_filter
+                )
+                yield from page_data.results
+                has_more = page_data.has_more
+                start_cursor = page_data.next_cursor
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future: Future | None = executor.submit(
+                self._get_database_page, query_filter=query_filter
+            )
+            while future is not None:
+                page_data = future.result()
+                future = None
+                if page_data.has_more:
+                    future = executor.submit(
+                        self._get_database_page,
+                        start_cursor=page_data.next_cursor,
+                        query_filter=query_filter,
+                    )
+                yield from page_data.results
+
+
+def _extract_title(prop: dict[str, Any] | None) -> str | None:
+    """Return the plain text of a title property, or None if it is missing."""
+    try:
+        return prop["title"][0]["text"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _extract_select(prop: dict[str, Any] | None) -> str | None:
+    """Return the option name of a select property, or None if it is missing."""
+    try:
+        return prop["select"]["name"]
+    except (KeyError, TypeError):
+        return None
+
+
+def _extract_number(prop: dict[str, Any] | None) -> int | float | None:
+    """Return the value of a number property, or None if it is missing."""
+    try:
+        return prop["number"]
+    except (KeyError, TypeError):
+        return None
+
+
+_EXTRACTORS = {
+    "title": _extract_title,
+    "select": _extract_select,
+    "number": _extract_number,
+}
+
+# Ingredient field, Notion property name and Notion property type.
+_SCHEMA = (
+    ("name", "Name", "title"),
+    ("type", "Type", "select"),
+    ("units_of_measurement", "Units of Measurement", "select"),
+    ("calories_per_100g", "Calories per 100g", "number"),
+    ("protein_per_100g", "Protein per 100g", "number"),
+    ("fat_per_100g", "Fat per 100g", "number"),
+    ("carbs_per_100g", "Carbohydrate per 100g", "number"),
+    ("shelf_life_room", "Shelf life room", "number"),
+    ("shelf_life_fridge", "Shelf life fridge", "number"),
+    ("shelf_life_freezer", "Shelf life freezer", "number"),
+)
+
+_PROPERTY_KEYS = tuple(key for _, key, _ in _SCHEMA)
+_PROPERTY_GETTER = itemgetter(*_PROPERTY_KEYS)
+_FIELD_EXTRACTORS = tuple((field, _EXTRACTORS[kind]) for field, _, kind in _SCHEMA)
+
+_REQUIRED_FIELDS = tuple(
+    field for field, info in Ingredient.model_fields.items() if info.is_required()
+)
+_FLOAT_FIELDS = (
+    "calories_per_100g",
+    "protein_per_100g",
+    "fat_per_100g",
+    "carbs_per_100g",
+)
+_INT_FIELDS = ("shelf_life_room", "shelf_life_fridge", "shelf_life_freezer")
 
-    This method parses a list of Notion pages into ingredient objects.
-    Any ingredients that are missing required attributes are skipped.
+
+def parse_ingredient_data(database_data: Iterable[Page]) -> list[Ingredient]:
+    """Parse Notion pages into ingredient objects.
+
+    This method parses an iterable of Notion pages into ingredient objects,
+    consuming it one page at a time. Any ingredients that are missing
+    required attributes are skipped.
 
     Parameters
     ----------
-    database_data: list[Page]
-        A list of Notion pages to parse.
+    database_data: Iterable[Page]
+        The Notion pages to parse.
 
     Returns
     -------
@@ -137,18 +332,14 @@ def parse_ingredient_data(database_data: list[Page]) -> list[Ingredient]:
     """
     ingredients = []
     for page in database_data:
-        page_name = (
-            page.properties.get("Name", {})
-            .get("title", [{}])[0]
-            .get("text", {})
-            .get("content")
-        )
         try:
             ingredient = parse_ingredient_page(page)
             ingredients.append(ingredient)
-        except (AttributeError, ValidationError) as e:
-            logger.info(f"Skipping ingredient {page_name} due to missing attributes")
-            logger.info(e)
+        except (AttributeError, ValueError) as e:
+            page_name = _extract_title(page.properties.get("Name"))
+            logger.debug(
+                "Skipping ingredient %s due to missing attributes: %s", page_name, e
+            )
             continue
     return ingredients
 
@@ -168,29 +359,30 @@ def parse_ingredient_page(page: Page) -> Ingredient:
         An ingredient object for that page.
     """
     properties = page.properties
-    name = (
-        properties.get("Name", {}).get("title", [{}])[0].get("text", {}).get("content")
-    )
-    type = properties.get("Type", {}).get("select", {}).get("name")
-    units_of_measurement = (
-        properties.get("Units of Measurement", {}).get("select", {}).get("name")
-    )
-    calories_per_100g = properties.get("Calories per 100g", {}).get("number")
-    protein_per_100g = properties.get("Protein per 100g", {}).get("number")
-    fat_per_100g = properties.get("Fat per 100g", {}).get("number")
-    carbs_per_100g = properties.get("Carbohydrate per 100g", {}).get("number")
-    shelf_life_room = properties.get("Shelf life room", {}).get("number")
-    shelf_life_fridge = properties.get("Shelf life fridge", {}).get("number")
-    shelf_life_freezer = properties.get("Shelf life freezer", {}).get("number")
-    return Ingredient(
-        name=name,
-        type=type,
-        units_of_measurement=units_of_measurement.lower(),
-        calories_per_100g=calories_per_100g,
-        protein_per_100g=protein_per_100g,
-        fat_per_100g=fat_per_100g,
-        carbs_per_100g=carbs_per_100g,
-        shelf_life_room=shelf_life_room,
-        shelf_life_fridge=shelf_life_fridge,
-        shelf_life_freezer=shelf_life_freezer,
+    try:
+        values = _PROPERTY_GETTER(properties)
+    except KeyError:
+        # Notion returns every database property, but fall back for pages
+        # that are missing some of them.
+        values = [properties.get(key) for key in _PROPERTY_KEYS]
+    fields = {
+        field: extract(value)
+        for (field, extract), value in zip(_FIELD_EXTRACTORS, values)
+    }
+    missing = [field for field in _REQUIRED_FIELDS if fields[field] is None]
+    if missing:
+        raise AttributeError(f"Missing required attributes: {', '.join(missing)}")
+    for field in _FLOAT_FIELDS:
+        fields[field] = float(fields[field])
+    for field in _INT_FIELDS:
+        value = fields[field]
+        if value is not None:
+            if value != int(value):
+                raise ValueError(f"{field} must be a whole number, got {value}")
+            fields[field] = int(value)
+    fields["type"] = IngredientType.from_raw(fields["type"])
+    fields["units_of_measurement"] = UnitOfMeasurement.from_raw(
+        fields["units_of_measurement"]
     )
+    # Every field has been checked and normalised above, so skip validation.
+    return Ingredient.model_construct(**fields)
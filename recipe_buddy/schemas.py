@@ -20,10 +20,41 @@ class IngredientType(StrEnum):
     def __str__(self) -> str:
         return self.value
 
+    @classmethod
+    def from_raw(cls, value: str) -> "IngredientType":
+        """Look up an ingredient type by its value, ignoring case."""
+        return _lookup(_INGREDIENT_TYPE_INDEX, cls, value)
+
 
 class UnitOfMeasurement(StrEnum):
     GRAMS = "grams"
 
+    @classmethod
+    def from_raw(cls, value: str) -> "UnitOfMeasurement":
+        """Look up a unit of measurement by its value, ignoring case."""
+        return _lookup(_UNIT_OF_MEASUREMENT_INDEX, cls, value)
+
+
+def _lookup[E: StrEnum](index: dict[str, E], enum: type[E], value: str) -> E:
+    try:
+        return index[value]
+    except KeyError:
+        pass
+    try:
+        return index[value.lower()]
+    except KeyError:
+        raise ValueError(f"{value!r} is not a valid {enum.__name__}") from None
+
+
+_INGREDIENT_TYPE_INDEX = {
+    **{e.value: e for e in IngredientType},
+    **{e.value.lower(): e for e in IngredientType},
+}
+_UNIT_OF_MEASUREMENT_INDEX = {
+    **{e.value: e for e in UnitOfMeasurement},
+    **{e.value.lower(): e for e in UnitOfMeasurement},
+}
+
 
 class Ingredient(BaseModel):
     name: str
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from recipe_buddy.cache import CACHE_VERSION, IngredientCache
+from recipe_buddy.schemas import Ingredient, IngredientType, UnitOfMeasurement
+
+
+@pytest.fixture
+def ingredient():
+    """Return an ingredient for testing."""
+    return Ingredient(
+        name="Chicken",
+        type=IngredientType.PROTEIN,
+        units_of_measurement=UnitOfMeasurement.GRAMS,
+        calories_per_100g=165,
+        protein_per_100g=31,
+        fat_per_100g=3.6,
+        carbs_per_100g=0,
+        shelf_life_fridge=3,
+    )
+
+
+def test_ingredient_cache_round_trip(tmp_path, ingredient):
+    """Test that cached ingredients survive a save and reload."""
+    path = tmp_path / "ingredients.json"
+    cache = IngredientCache("database_id_1", path)
+    cache.set("page_id_1", "2023-01-01T00:00:00.000Z", ingredient)
+    cache.set("page_id_2", "2023-02-01T00:00:00.000Z", ingredient)
+    cache.save()
+
+    reloaded = IngredientCache("database_id_1", path)
+
+    assert reloaded.last_edited_time() == "2023-02-01T00:00:00.000Z"
+    assert reloaded.ingredients() == [ingredient, ingredient]
+    assert reloaded.ingredients()[0].type is IngredientType.PROTEIN
+
+
+def test_ingredient_cache_ignores_stale_version(tmp_path, ingredient):
+    """Test that a cache written with a different version is discarded."""
+    path = tmp_path / "ingredients.json"
+    cache = IngredientCache("database_id_1", path)
+    cache.set("page_id_1", "2023-01-01T00:00:00.000Z", ingredient)
+    cache.save()
+    data = json.loads(path.read_text())
+    data["version"] = CACHE_VERSION + 1
+    path.write_text(json.dumps(data))
+
+    reloaded = IngredientCache("database_id_1", path)
+
+    assert reloaded.last_edited_time() is None
+    assert reloaded.ingredients() == []
+
+
+def test_ingredient_cache_ignores_other_database(tmp_path, ingredient):
+    """Test that a cache written for a different database is discarded."""
+    path = tmp_path / "ingredients.json"
+    cache = IngredientCache("database_id_1", path)
+    cache.set("page_id_1", "2023-01-01T00:00:00.000Z", ingredient)
+    cache.save()
+
+    assert IngredientCache("database_id_2", path).ingredients() == []
+
+
+def test_ingredient_cache_invalidate(tmp_path, ingredient):
+    """Test that invalidate removes all entries."""
+    cache = IngredientCache("database_id_1", tmp_path / "ingredients.json")
+    cache.set("page_id_1", "2023-01-01T00:00:00.000Z", ingredient)
+
+    cache.invalidate()
+
+    assert cache.ingredients() == []
@@ -1,8 +1,10 @@
 import os
 from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
 
+from recipe_buddy.cache import IngredientCache
 from recipe_buddy.notion import (
     NotionAPIDatabaseResponse,
     NotionDatabase,
@@ -87,9 +89,26 @@ def notion_database():
         return NotionDatabase("mock_database_id")
 
 
+def test_notion_database_headers(notion_database):
+    """Test that the client is authorised with the Notion token."""
+    assert notion_database._client.headers["Authorization"] == "Bearer mock_token"
+    assert notion_database._client.headers["Notion-Version"] == "2022-06-28"
+    assert notion_database._client.timeout.read == 30.0
+
+
+@patch("recipe_buddy.notion.load_dotenv")
+def test_notion_database_missing_token(mock_load_dotenv):
+    """Test that a missing Notion token raises an error."""
+    with (
+        patch.dict(os.environ, clear=True),
+        pytest.raises(RuntimeError, match="NOTION_TOKEN not set"),
+    ):
+        NotionDatabase("mock_database_id")
+
+
 def test_parse_ingredient_page(mock_notion_response):
     """Test the parse_ingredient_page function."""
-    page = Page(**mock_notion_response["results"][0])
+    page = Page.from_api(mock_notion_response["results"][0])
     ingredient = parse_ingredient_page(page)
 
     assert isinstance(ingredient, Ingredient)
@@ -107,7 +126,7 @@ def test_parse_ingredient_page(mock_notion_response):
 
 def test_parse_ingredient_page_missing_substitutions(mock_notion_response):
     """Test the parse_ingredient_page function with missing substitutions."""
-    page = Page(**mock_notion_response["results"][1])
+    page = Page.from_api(mock_notion_response["results"][1])
     ingredient = parse_ingredient_page(page)
 
     assert isinstance(ingredient, Ingredient)
@@ -117,7 +136,7 @@ def test_parse_ingredient_page_missing_substitutions(mock_notion_response):
 
 def test_parse_ingredient_data(mock_notion_response):
     """Test the parse_ingredient_data function."""
-    pages = [Page(**page) for page in mock_notion_response["results"]]
+    pages = [Page.from_api(page) for page in mock_notion_response["results"]]
     ingredients = parse_ingredient_data(pages)
 
     assert len(ingredients) == 2
@@ -129,12 +148,13 @@ def test_parse_ingredient_data(mock_notion_response):
 def test_parse_ingredient_data_with_invalid_page(mock_notion_response):
     """Test the parse_ingredient_data function with an invalid page."""
     # Create a valid page and an invalid page with missing required fields
-    valid_page = Page(**mock_notion_response["results"][0])
+    valid_page = Page.from_api(mock_notion_response["results"][0])
     invalid_page_data = mock_notion_response["results"][0].copy()
-    invalid_page_data["properties"]["Calories per 100g"] = {
-        "number": None
+    invalid_page_data["properties"] = {
+        **invalid_page_data["properties"],
+        "Calories per 100g": {"number": None},
     }  # Make calories None
-    invalid_page = Page(**invalid_page_data)
+    invalid_page = Page.from_api(invalid_page_data)
 
     pages = [valid_page, invalid_page]
 
@@ -143,16 +163,61 @@ def test_parse_ingredient_data_with_invalid_page(mock_notion_response):
         ingredients = parse_ingredient_data(pages)
         assert len(ingredients) == 1
         assert ingredients[0].name == "Chicken"
-        mock_logger.info.assert_called()
+        mock_logger.debug.assert_called()
+
+
+def test_parse_ingredient_page_coerces_numbers(mock_notion_response):
+    """Test that numeric properties are coerced to the Ingredient field types."""
+    page = Page.from_api(mock_notion_response["results"][0])
+    ingredient = parse_ingredient_page(page)
+
+    assert type(ingredient.calories_per_100g) is float
+    assert type(ingredient.carbs_per_100g) is float
+    assert type(ingredient.shelf_life_room) is int
+
+
+def test_parse_ingredient_data_with_fractional_shelf_life(mock_notion_response):
+    """Test that a page with a fractional shelf life is skipped."""
+    page_data = mock_notion_response["results"][0].copy()
+    page_data["properties"] = {
+        **page_data["properties"],
+        "Shelf life room": {"number": 1.5},
+    }
+
+    ingredients = parse_ingredient_data([Page.from_api(page_data)])
 
+    assert ingredients == []
 
-@patch("requests.post")
+
+def test_parse_ingredient_data_with_empty_properties(mock_notion_response):
+    """Test that pages with empty or missing properties are skipped."""
+    empty_select_data = mock_notion_response["results"][0].copy()
+    empty_select_data["properties"] = {
+        **empty_select_data["properties"],
+        "Type": {"select": None},
+    }
+    empty_title_data = mock_notion_response["results"][1].copy()
+    empty_title_data["properties"] = {
+        key: value
+        for key, value in empty_title_data["properties"].items()
+        if key != "Units of Measurement"
+    }
+    empty_title_data["properties"]["Name"] = {"title": []}
+
+    ingredients = parse_ingredient_data(
+        [Page.from_api(empty_select_data), Page.from_api(empty_title_data)]
+    )
+
+    assert ingredients == []
+
+
+@patch("httpx.Client.post")
 def test_notion_database_get_database_page(
     mock_post, notion_database, mock_notion_response
 ):
     """Test the _get_database_page method."""
     mock_response = MagicMock()
-    mock_response.json.return_value = mock_notion_response
+    mock_response.content = orjson.dumps(mock_notion_response)
     mock_post.return_value = mock_response
 
     response = notion_database._get_database_page()
@@ -160,6 +225,23 @@ def test_notion_database_get_database_page(
     mock_post.assert_called_once()
     assert isinstance(response, NotionAPIDatabaseResponse)
     assert len(response.results) == 2
+    assert all(isinstance(page, Page) for page in response.results)
+
+
+@patch("httpx.Client.post")
+def test_notion_database_get_database_page_with_validation(
+    mock_post, notion_database, mock_notion_response
+):
+    """Test the _get_database_page method with response validation."""
+    mock_response = MagicMock()
+    mock_response.content = orjson.dumps(mock_notion_response)
+    mock_post.return_value = mock_response
+
+    response = notion_database._get_database_page(validate=True)
+
+    assert isinstance(response, NotionAPIDatabaseResponse)
+    assert isinstance(response.results[0], Page)
+    assert response.results[0].id == "page_id_1"
 
 
 @patch("recipe_buddy.notion.NotionDatabase._get_database_page")
@@ -202,3 +284,124 @@ def test_get_ingredients_data_multiple_pages(
 
     assert mock_get_database_page.call_count == 2
     assert len(ingredients) == 4  # 2 from first page, 2 from second page
+
+
+@patch("recipe_buddy.notion.NotionDatabase._get_database_page")
+def test_get_ingredients_data_without_prefetch(
+    mock_get_database_page, notion_database, mock_notion_response
+):
+    """Test the get_ingredients_data method with prefetching disabled."""
+    first_response = mock_notion_response.copy()
+    first_response["has_more"] = True
+    first_response["next_cursor"] = "next_page_cursor"
+
+    mock_get_database_page.side_effect = [
+        NotionAPIDatabaseResponse(**first_response),
+        NotionAPIDatabaseResponse(**mock_notion_response),
+    ]
+
+    ingredients = notion_database.get_ingredients_data(prefetch=False)
+
+    assert mock_get_database_page.call_count == 2
+    assert len(ingredients) == 4
+
+
+@patch("recipe_buddy.notion.time.sleep")
+@patch("httpx.Client.post")
+def test_notion_database_retries_when_rate_limited(
+    mock_post, mock_sleep, notion_database, mock_notion_response
+):
+    """Test that a 429 response is retried after the Retry-After delay."""
+    rate_limited_response = MagicMock(status_code=429, headers={"Retry-After": "2"})
+    mock_response = MagicMock(status_code=200)
+    mock_response.content = orjson.dumps(mock_notion_response)
+    mock_post.side_effect = [rate_limited_response, mock_response]
+
+    response = notion_database._get_database_page()
+
+    assert mock_post.call_count == 2
+    mock_sleep.assert_any_call(2)
+    assert len(response.results) == 2
+
+
+@patch("recipe_buddy.notion.NotionDatabase._get_database_page")
+def test_get_ingredients_data_with_cache(
+    mock_get_database_page, tmp_path, mock_notion_response
+):
+    """Test that a cached sync only requests pages edited since the last sync."""
+    cache = IngredientCache("mock_database_id", tmp_path / "ingredients.json")
+    with patch.dict(os.environ, {"NOTION_TOKEN": "mock_token"}):
+        notion_database = NotionDatabase("mock_database_id", cache=cache)
+
+    mock_get_database_page.return_value = NotionAPIDatabaseResponse(
+        **mock_notion_response
+    )
+    assert len(notion_database.get_ingredients_data()) == 2
+    assert mock_get_database_page.call_args.kwargs["query_filter"] is None
+
+    # Second sync only returns the edited Rice page.
+    delta_response = mock_notion_response.copy()
+    delta_response["results"] = [mock_notion_response["results"][1]]
+    mock_get_database_page.return_value = NotionAPIDatabaseResponse(**delta_response)
+    ingredients = notion_database.get_ingredients_data()
+
+    assert mock_get_database_page.call_args.kwargs["query_filter"] == {
+        "timestamp": "last_edited_time",
+        "last_edited_time": {"on_or_after": "2023-01-01T00:00:00.000Z"},
+    }
+    assert [ingredient.name for ingredient in ingredients] == ["Chicken", "Rice"]
+
+
+@patch("recipe_buddy.notion.NotionDatabase._get_database_page")
+def test_get_ingredients_data_with_cache_discards_invalid_page(
+    mock_get_database_page, tmp_path, mock_notion_response
+):
+    """Test that a cached page which becomes invalid is removed from the cache."""
+    cache = IngredientCache("mock_database_id", tmp_path / "ingredients.json")
+    with patch.dict(os.environ, {"NOTION_TOKEN": "mock_token"}):
+        notion_database = NotionDatabase("mock_database_id", cache=cache)
+
+    mock_get_database_page.return_value = NotionAPIDatabaseResponse(
+        **mock_notion_response
+    )
+    assert len(notion_database.get_ingredients_data()) == 2
+
+    # Second sync returns the Rice page with its calories removed.
+    invalid_page_data = mock_notion_response["results"][1].copy()
+    invalid_page_data["properties"] = {
+        **invalid_page_data["properties"],
+        "Calories per 100g": {"number": None},
+    }
+    delta_response = mock_notion_response.copy()
+    delta_response["results"] = [invalid_page_data]
+    mock_get_database_page.return_value = NotionAPIDatabaseResponse(**delta_response)
+    ingredients = notion_database.get_ingredients_data()
+
+    reloaded = IngredientCache("mock_database_id", tmp_path / "ingredients.json")
+
+    assert [ingredient.name for ingredient in ingredients] == ["Chicken"]
+    assert [ingredient.name for ingredient in reloaded.ingredients()] == ["Chicken"]
+
+
+@patch("recipe_buddy.notion.NotionDatabase._get_database_page")
+def test_get_ingredients_data_with_cache_failed_sync(
+    mock_get_database_page, tmp_path, mock_notion_response
+):
+    """Test that a sync which fails partway leaves the cache unchanged."""
+    cache = IngredientCache("mock_database_id", tmp_path / "ingredients.json")
+    with patch.dict(os.environ, {"NOTION_TOKEN": "mock_token"}):
+        notion_database = NotionDatabase("mock_database_id", cache=cache)
+
+    first_response = mock_notion_response.copy()
+    first_response["has_more"] = True
+    first_response["next_cursor"] = "next_page_cursor"
+    mock_get_database_page.side_effect = [
+        NotionAPIDatabaseResponse(**first_response),
+        RuntimeError("connection lost"),
+    ]
+
+    with pytest.raises(RuntimeError):
+        notion_database.get_ingredients_data()
+
+    assert cache.last_edited_time() is None
+    assert cache.ingredients() == []
@@ -0,0 +1,27 @@
+import pytest
+
+from recipe_buddy.schemas import IngredientType, UnitOfMeasurement
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("Protein", IngredientType.PROTEIN),
+        ("protein", IngredientType.PROTEIN),
+        ("LEGUME/PULSE", IngredientType.LEGUME_PULSE),
+    ],
+)
+def test_ingredient_type_from_raw(value, expected):
+    """Test that ingredient types are looked up ignoring case."""
+    assert IngredientType.from_raw(value) is expected
+
+
+def test_unit_of_measurement_from_raw():
+    """Test that units of measurement are looked up ignoring case."""
+    assert UnitOfMeasurement.from_raw("Grams") is UnitOfMeasurement.GRAMS
+
+
+def test_from_raw_invalid_value():
+    """Test that an unknown value raises a ValueError."""
+    with pytest.raises(ValueError, match="not a valid IngredientType"):
+        IngredientType.from_raw("Meat")